@@ -1,8 +1,4 @@
-from os.path import dirname, basename, isfile, join
-import glob
-
-modules = glob.glob(join(dirname(__file__), "*.py"))
 __all__ = [
-    basename(f)[:-3] for f in modules
-    if isfile(f) and not f.endswith('__init__.py')
+    'covid', 'distribution', 'gaps', 'groupby', 'importtime', 'plot',
+    'plotdata', 'scenario', 'similarity', 'snapshot', 'store', 'study'
 ]
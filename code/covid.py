@@ -5,9 +5,11 @@ This module contains information about the covid itself and can be inherited usi
 from dataclasses import dataclass
 import pandas as pd
 from itertools import product
-from typing import List, Tuple
+from typing import Dict, List, Tuple
 import numpy as np
 
+from gaps import GAP_FILLING_METHODS
+
 Column = Tuple[str]
 
 
@@ -21,6 +23,10 @@ class CovidStudyMixin():
     country_filter: dict = None
     countries_to_study: List[str] = None
 
+    # Gap filling
+    gap_filling: Dict[str, List[Column]] = None
+    gap_limit: int = None
+
     def __post_init__(self):
 
         super().__post_init__()
@@ -37,6 +43,10 @@ class CovidStudyMixin():
         self.set_indexes()
         self.set_columns()
 
+        # Gaps
+        self.coverage = self.calc_coverage()
+        self.fill_gaps()
+
         # Plotting
         # --params
         self.plot_kwargs = {"kind": self.plot_kind}
@@ -137,10 +147,51 @@ class CovidStudyMixin():
         return pd.MultiIndex.from_tuples(
             (tup for group in self.study_groups for tup in group))
 
+    @property
+    def default_gap_filling(self) -> Dict[str, List[Column]]:
+        return {
+            'cumulative': self.covid_params + self.protection_params,
+            'interpolate': self.health_sys_params,
+            'ffill': self.policy_params + self.index_params
+        }
+
     @property
     def countries(self) -> List[str]:
         return list(set(self.data.index.get_level_values('country')))
 
+    @property
+    def filled_coverage(self) -> pd.DataFrame:
+        """
+        Fraction of non-null values of each parameter (columns) for each country (rows) after
+        filling the gaps. The `coverage` attribute has the fraction before filling them.
+        """
+        return self.calc_coverage()
+
+    def calc_coverage(self) -> pd.DataFrame:
+        """
+        Fraction of non-null values of each parameter (columns) for each country (rows) of the
+        current data.
+        """
+        if self.data is None or self.indexes[1] not in self.data.index.names:
+            print("Couldn't calc_coverage because the country index couldn't be found!")
+            return None
+        return self.data.notna().groupby(level='country').mean()
+
+    def store_countries(self) -> List[str]:
+        """
+        Countries to materialize from the store: the countries to study.
+        """
+        self.set_countries_to_study()
+        if not isinstance(self.countries_to_study, list):
+            return None
+        return self.countries_to_study
+
+    def store_columns(self) -> List[str]:
+        """
+        Columns to materialize from the store: the study parameters.
+        """
+        return self.study_params.get_level_values(-1).to_list()
+
     def filter_columns(self):
         """
         This method ensures that only the interesting columns and the indexes are kept
@@ -196,6 +247,37 @@ class CovidStudyMixin():
 
         self.data.columns = self.study_params
 
+    def fill_gaps(self):
+        """
+        This method fills the gaps of the series of each country, without leaking values between
+        countries, as defined in `gap_filling`: a dict of method -> (partial) columns.
+        The methods are:
+            - 'ffill': forward fill.
+            - 'interpolate': linear interpolation of the gaps between two values.
+            - 'cumulative': repair of cumulative series so they never decrease (drops are held at
+              the last total) and forward fill.
+        At most `gap_limit` consecutive nulls are filled (all if it's None).
+        """
+        if not self.gap_filling:
+            return
+
+        data = self.data.copy()
+        countries = data.index.get_level_values('country').to_numpy()
+        dates = pd.to_datetime(data.index.get_level_values('date')).asi8
+
+        for method, columns in self.gap_filling.items():
+            if method not in GAP_FILLING_METHODS:
+                print(f"Couldn't fill gaps with unknown method '{method}'!")
+                continue
+            columns = matching_columns(columns, data.columns)
+            if not columns:
+                continue
+            data[columns] = GAP_FILLING_METHODS[method](
+                data[columns], countries, dates,
+                limit=self.gap_limit).to_numpy()
+
+        self.data = data
+
     def set_countries_to_study(self):
         """
         This method ensures that the countries to study are set correctly.
@@ -219,12 +301,28 @@ class CovidStudyMixin():
             )
             return
 
-        df = self.country_data
+        self.countries_to_study = self.countries_from_filter(
+            self.country_data, self.country_filter)
+
+    @staticmethod
+    def countries_from_filter(country_data: pd.DataFrame,
+                              country_filter: dict) -> List[str]:
+        """
+        Returns the countries in 'country_data' that match any of the values in 'country_filter'.
+
+        Args:
+            country_data (pd.DataFrame): Data of the countries, indexed by country.
+            country_filter (dict): Column of 'country_data' -> values to keep.
+
+        Returns:
+            List[str]: Countries that match the filter.
+        """
+        df = country_data
         mask = np.full((len(df)), False)
-        for col, vals in self.country_filter.items():
+        for col, vals in country_filter.items():
             mask = np.logical_or(mask, [val in vals for val in df.loc[:, col]])
 
-        self.countries_to_study = df.loc[mask].index.tolist()
+        return df.loc[mask].index.tolist()
 
     def filter_countries(self):
         """
@@ -246,5 +344,22 @@ class CovidStudyMixin():
                 "Couldn't filter by countries because the country column/index couldn't be found!"
             )
             return
-        mask_country = [c_id in self.countries_to_study for c_id in c_values]
-        self.data = self.data.loc[mask_country]
\ No newline at end of file
+        mask_country = pd.Index(c_values).isin(self.countries_to_study)
+        self.data = self.data.loc[mask_country]
+
+
+def matching_columns(columns: List[Column],
+                     df_columns: pd.Index) -> List[Column]:
+    """
+    Returns the columns in 'df_columns' that are, or start with, any of the given (partial)
+    columns, e.g. ('covid', 'status') matches all the covid status parameters.
+    """
+    if not isinstance(columns, list):
+        columns = [columns]
+    columns = [(col, ) if isinstance(col, str) else tuple(col)
+               for col in columns]
+    return [
+        df_col for df_col in df_columns if any(
+            (df_col if isinstance(df_col, tuple) else (df_col, ))[:len(col)] ==
+            col for col in columns)
+    ]
@@ -0,0 +1,194 @@
+"""
+This module contains the Distribution class that computes the value distributions of the study
+parameters as plain pandas.DataFrames, without the plotting stack.
+"""
+
+from dataclasses import dataclass
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
+
+Column = Tuple[str]
+
+DEFAULT_QUANTILES = (0, 0.05, 0.25, 0.5, 0.75, 0.95, 1)
+
+
+@dataclass
+class Distribution():
+    """
+    Value distributions of the columns of a dataset.
+
+    The histograms of the columns of the same group share their bin edges, so that they can be
+    compared directly. Passing the `edges` of a previous Distribution to `from_df` keeps the
+    bins fixed across runs, so that the distributions of new data can be merged with `+` and
+    saved/loaded with `save`/`from_path`. Each attribute is a plain pandas object with the
+    columns as labels:
+        - `counts`: DataFrame of the number of values in each bin (rows) of each column.
+        - `edges`: DataFrame of the bin edges (rows) of each column.
+        - `quantiles`: DataFrame of the quantiles (rows) of each column.
+        - `null_counts`: Series of the number of null values of each column.
+    """
+
+    counts: pd.DataFrame = None
+    edges: pd.DataFrame = None
+    quantiles: pd.DataFrame = None
+    null_counts: pd.Series = None
+
+    def histogram(self, column: Column) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the counts and the bin edges of the given column.
+        """
+        return self.counts[column].to_numpy(), self.edges[column].to_numpy()
+
+    def is_empty(self, column: Column) -> bool:
+        """
+        Returns whether the given column has no values.
+        """
+        return column not in self.counts.columns or self.counts[column].sum(
+        ) == 0
+
+    def __add__(self, other: 'Distribution') -> 'Distribution':
+        """
+        Merges the histograms and null counts of two distributions with the same columns and bin
+        edges, e.g. of two batches of data. The quantiles can't be merged and are set to None.
+        """
+        if not self.counts.columns.equals(other.counts.columns):
+            raise ValueError("Can't merge distributions of different columns!")
+        if self.edges.shape != other.edges.shape or not np.allclose(
+                self.edges.to_numpy(), other.edges.to_numpy(), equal_nan=True):
+            raise ValueError(
+                "Can't merge distributions with different bin edges! "
+                "Compute them with the same 'edges'.")
+
+        return Distribution(counts=self.counts + other.counts,
+                            edges=self.edges.copy(),
+                            null_counts=self.null_counts + other.null_counts)
+
+    def save(self, path: str):
+        """
+        Saves the distribution to the given path.
+        """
+        pd.to_pickle(
+            {
+                'counts': self.counts,
+                'edges': self.edges,
+                'quantiles': self.quantiles,
+                'null_counts': self.null_counts
+            }, path)
+
+    @classmethod
+    def from_path(cls, path: str) -> 'Distribution':
+        """
+        Load instance from the given path written by `save`.
+        """
+        return cls(**pd.read_pickle(path))
+
+    @classmethod
+    def from_df(cls,
+                df: pd.DataFrame,
+                groups: List[List[Column]] = None,
+                bins: int = 20,
+                quantiles: Tuple[float] = DEFAULT_QUANTILES,
+                edges: pd.DataFrame = None) -> 'Distribution':
+        """
+        Computes the distributions of the columns of the given dataframe.
+
+        Args:
+            df (pd.DataFrame): Data to compute the distributions of.
+            groups (List[List[Column]]): Groups of columns that share bin edges. Columns not in
+                'df' are ignored. If None, each column is its own group.
+            bins (int): Number of bins of the histograms. Ignored if 'edges' are given, all the
+                histograms then have their number of bins.
+            quantiles (Tuple[float]): Quantiles to compute.
+            edges (pd.DataFrame): Fixed bin edges of the columns, e.g. the `edges` of a previous
+                Distribution. Values outside them aren't counted. The edges of the groups whose
+                first column isn't in it are computed from the data.
+
+        Returns:
+            Distribution: Distributions of the columns.
+        """
+        if groups is None:
+            groups = [[col] for col in df.columns]
+        groups = [[col for col in group if col in df.columns]
+                  for group in groups]
+        groups = [group for group in groups if group]
+        columns = [col for group in groups for col in group]
+        if isinstance(df.columns, pd.MultiIndex):
+            columns = pd.MultiIndex.from_tuples(columns,
+                                                names=df.columns.names)
+
+        # All the histograms must have the same number of bins to share the counts DataFrame
+        if edges is not None:
+            bins = len(edges) - 1
+
+        all_counts, all_edges = [], []
+        for group in groups:
+            fixed_edges = None
+            if edges is not None and group[0] in edges.columns:
+                fixed_edges = edges[group[0]].to_numpy()
+                if not np.isfinite(fixed_edges).all():
+                    fixed_edges = None
+            group_counts, group_edges = histograms(
+                df[group].to_numpy(dtype=np.float64), bins, fixed_edges)
+            all_counts.append(group_counts)
+            all_edges.append(
+                np.repeat(group_edges[:, None], len(group), axis=1))
+
+        values = df[columns]
+        return cls(counts=pd.DataFrame(np.hstack(all_counts), columns=columns),
+                   edges=pd.DataFrame(np.hstack(all_edges), columns=columns),
+                   quantiles=values.quantile(list(quantiles)),
+                   null_counts=values.isna().sum())
+
+
+def histograms(values: np.ndarray,
+               bins: int,
+               edges: np.ndarray = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Computes the histograms of all the columns of 'values' with shared bin edges in one pass.
+
+    As in `np.histogram`, the bins are half-open except the last one, and if all the values are
+    equal the edges span from 0.5 below to 0.5 above that value.
+
+    Args:
+        values (np.ndarray): 2D array with the values of each column. Nulls are ignored.
+        bins (int): Number of bins. Ignored if 'edges' are given.
+        edges (np.ndarray): Fixed bin edges. Values outside them aren't counted. If None, they
+            span from the minimum to the maximum value.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Counts of shape (bins, columns) and edges of shape
+            (bins + 1,).
+    """
+    num_columns = values.shape[1]
+    finite = np.isfinite(values)
+    column_numbers = np.broadcast_to(np.arange(num_columns), values.shape)
+
+    if edges is None:
+        if not finite.any():
+            return np.zeros((bins, num_columns),
+                            dtype=np.int64), np.full(bins + 1, np.nan)
+
+        low, high = values[finite].min(), values[finite].max()
+        if low == high:
+            low, high = low - 0.5, high + 0.5
+        edges = np.linspace(low, high, bins + 1)
+
+        bin_numbers = np.clip(
+            ((values[finite] - low) / (high - low) * bins).astype(np.int64),
+            0, bins - 1)
+        column_numbers = column_numbers[finite]
+    else:
+        bins = len(edges) - 1
+        in_range = finite & (values >= edges[0]) & (values <= edges[-1])
+        bin_numbers = np.clip(
+            np.searchsorted(edges, values[in_range], side='right') - 1, 0,
+            bins - 1)
+        column_numbers = column_numbers[in_range]
+
+    # Bin of each value, offset by the bins of the previous columns
+    counts = np.bincount(bin_numbers + bins * column_numbers,
+                         minlength=bins * num_columns)
+
+    return counts.reshape(num_columns, bins).T, edges
@@ -0,0 +1,120 @@
+"""
+This module contains the filling of the gaps (null values) of the series of each group, e.g. of each
+country, in a single vectorized pass over all the groups and without leaking values between them.
+"""
+
+from functools import wraps
+from typing import Callable, Dict
+
+import numpy as np
+import pandas as pd
+
+
+def sort_by_group(func: Callable) -> Callable:
+    """
+    Decorator that calls 'func(df, groups, x, **kwargs)' with the rows sorted by group and then by
+    'x', and returns its result in the original row order.
+    """
+
+    @wraps(func)
+    def wrapper(df: pd.DataFrame, groups: np.ndarray, x: np.ndarray,
+                **kwargs) -> pd.DataFrame:
+        order = np.lexsort((x, groups))
+        result = func(df.iloc[order], groups[order], x[order], **kwargs)
+        return result.iloc[np.argsort(order)]
+
+    return wrapper
+
+
+@sort_by_group
+def forward_fill(df: pd.DataFrame,
+                 groups: np.ndarray,
+                 x: np.ndarray,
+                 limit: int = None) -> pd.DataFrame:
+    """
+    Fills each null value with the last previous value of its group.
+
+    Args:
+        df (pd.DataFrame): Data to fill.
+        groups (np.ndarray): Group of each row.
+        x (np.ndarray): Position of each row in its series, e.g. the date.
+        limit (int): Maximum number of consecutive nulls to fill. If None, all are filled.
+
+    Returns:
+        pd.DataFrame: Filled data.
+    """
+    return df.groupby(groups, sort=False).ffill(limit=limit)
+
+
+@sort_by_group
+def interpolate(df: pd.DataFrame,
+                groups: np.ndarray,
+                x: np.ndarray,
+                limit: int = None) -> pd.DataFrame:
+    """
+    Fills the gaps between two values of the same group by linear interpolation over 'x'. Gaps
+    at the start or the end of a group are left as they are.
+
+    Args:
+        df (pd.DataFrame): Data to fill.
+        groups (np.ndarray): Group of each row.
+        x (np.ndarray): Position of each row in its series, e.g. the date.
+        limit (int): Maximum length of the gaps to fill. If None, all are filled.
+
+    Returns:
+        pd.DataFrame: Filled data.
+    """
+    valid = df.notna().to_numpy()
+    x = x.astype(np.float64)
+    rows = np.arange(len(df), dtype=np.float64)
+
+    def around_gaps(values: np.ndarray):
+        values = pd.DataFrame(values, index=df.index).groupby(groups,
+                                                              sort=False)
+        return values.ffill().to_numpy(), values.bfill().to_numpy()
+
+    prev_value, next_value = around_gaps(df.to_numpy(dtype=np.float64))
+    prev_x, next_x = around_gaps(np.where(valid, x[:, None], np.nan))
+    prev_row, next_row = around_gaps(np.where(valid, rows[:, None], np.nan))
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        interpolated = prev_value + (next_value - prev_value) * (
+            x[:, None] - prev_x) / (next_x - prev_x)
+
+    to_fill = ~valid & ~np.isnan(prev_row) & ~np.isnan(next_row)
+    if limit is not None:
+        to_fill &= next_row - prev_row - 1 <= limit
+
+    return df.mask(to_fill, interpolated)
+
+
+@sort_by_group
+def repair_cumulative(df: pd.DataFrame,
+                      groups: np.ndarray,
+                      x: np.ndarray,
+                      limit: int = None) -> pd.DataFrame:
+    """
+    Repairs cumulative series so that they never decrease within a group, raising any value below
+    an earlier one to it, and then fills each null value with the last previous value of its
+    group. A drop (e.g. a reset to 0 or a missing report stored as 0) is thus held at the last
+    total instead of lowering the whole past of the series; a single spike, however, becomes a
+    floor for the rest of the group.
+
+    Args:
+        df (pd.DataFrame): Data to repair.
+        groups (np.ndarray): Group of each row.
+        x (np.ndarray): Position of each row in its series, e.g. the date.
+        limit (int): Maximum number of consecutive nulls to fill. If None, all are filled.
+
+    Returns:
+        pd.DataFrame: Repaired data.
+    """
+    df = df.groupby(groups, sort=False).cummax()
+    return df.groupby(groups, sort=False).ffill(limit=limit)
+
+
+GAP_FILLING_METHODS: Dict[str, Callable] = {
+    'ffill': forward_fill,
+    'interpolate': interpolate,
+    'cumulative': repair_cumulative,
+}
@@ -8,6 +8,8 @@ from typing import Callable, List, Tuple
 
 import pandas as pd
 
+from store import ColumnStore
+
 
 @dataclass
 class GroupbyMixin(ABC):
@@ -173,6 +175,44 @@ class GroupbyMixin(ABC):
         groupby.data = groupby.calc_groupby_data(df)
         return groupby
 
+    @classmethod
+    def from_store(cls,
+                   store: ColumnStore,
+                   countries: List[str] = None,
+                   downsampling: int = 1,
+                   prepare: Callable[[pd.DataFrame], pd.DataFrame] = None,
+                   countries_per_chunk: int = 100,
+                   **kwargs):
+        """
+        This method creates a new instance from the data in the given 'store', materializing and
+        grouping only 'countries_per_chunk' countries at a time.
+
+        Args:
+            store (ColumnStore): Store with the data to group.
+            countries (List[str]): Countries to group. If None, all are grouped.
+            downsampling (int): Step between the selected dates of each country.
+            prepare (Callable[[pd.DataFrame], pd.DataFrame]): Function to prepare each materialized
+                chunk before grouping it, e.g. `lambda df: CovidCountryStudy(data=df, downsampling=1).data`.
+            countries_per_chunk (int): Number of countries materialized at once.
+        """
+        groupby = cls(**kwargs)
+        if countries is None:
+            countries = store.countries
+
+        dfs_to_concat = []
+        for c in range(0, len(countries), countries_per_chunk):
+            df = store.to_frame(countries=countries[c:c + countries_per_chunk],
+                                downsampling=downsampling)
+            if prepare is not None:
+                df = prepare(df)
+            df = groupby.calc_groupby_data(df)
+            if df is not None:
+                dfs_to_concat.append(df)
+
+        if dfs_to_concat:
+            groupby.data = pd.concat(dfs_to_concat)
+        return groupby
+
 
 class CovidCountryStudyGroupby(GroupbyMixin):
     """
@@ -185,3 +225,32 @@ class CovidCountryStudyGroupby(GroupbyMixin):
         """
 
         return data.groupby('country')
+
+    def refresh_countries(self, data: pd.DataFrame, countries: List[str]):
+        """
+        This method recomputes the grouped data of only the given countries from the given new
+        version of the data, e.g. the countries of a `SnapshotDiff`, and keeps the rest as they
+        are.
+
+        Args:
+            data (pd.DataFrame): New version of the data to group.
+            countries (List[str]): Countries to recompute.
+        """
+        if data is None:
+            return
+
+        if 'country' in data.columns:
+            country_values = data['country']
+        else:
+            country_values = data.index.get_level_values('country')
+        refreshed = self.calc_groupby_data(
+            data.loc[pd.Index(country_values).isin(countries)])
+
+        dfs_to_concat = []
+        if self.data is not None:
+            dfs_to_concat.append(
+                self.data.loc[~self.data.index.isin(countries)])
+        if refreshed is not None:
+            dfs_to_concat.append(refreshed)
+        if dfs_to_concat:
+            self.data = pd.concat(dfs_to_concat)
@@ -0,0 +1,82 @@
+"""
+This module checks that the non-plotting entry points are imported without the plotting stack and
+within an import-time budget. Run it with `python importtime.py`.
+"""
+
+import subprocess
+import sys
+from os.path import dirname
+from typing import List, Tuple
+
+# Modules used by headless jobs and their import-time budget in seconds, on top of pandas
+HEADLESS_MODULES = [
+    'covid', 'distribution', 'gaps', 'groupby', 'plotdata', 'scenario',
+    'similarity', 'snapshot', 'store', 'study'
+]
+IMPORT_TIME_BUDGET = 0.1
+
+# Modules that must only be imported when a plot method is called
+PLOTTING_MODULES = ['matplotlib', 'seaborn']
+
+IMPORT_SCRIPT = """
+import sys, time
+import numpy, pandas
+t = time.perf_counter()
+import {module}
+print(time.perf_counter() - t)
+print(','.join(m for m in {plotting_modules} if m in sys.modules))
+"""
+
+
+def import_time(module: str) -> Tuple[float, List[str]]:
+    """
+    Imports the given module in a new interpreter and returns the time it took, without the time
+    to import numpy and pandas, and the plotting modules that were imported with it.
+
+    Args:
+        module (str): Name of the module to import.
+
+    Returns:
+        Tuple[float, List[str]]: Import time in seconds and imported plotting modules.
+    """
+    script = IMPORT_SCRIPT.format(module=module,
+                                  plotting_modules=PLOTTING_MODULES)
+    output = subprocess.run([sys.executable, '-c', script],
+                            cwd=dirname(__file__) or '.',
+                            capture_output=True,
+                            text=True,
+                            check=True).stdout.splitlines()
+    seconds = float(output[0])
+    plotting_modules = output[1].split(',') if output[1:] and output[1] else []
+    return seconds, plotting_modules
+
+
+def check_import_times(modules: List[str] = None,
+                       budget: float = IMPORT_TIME_BUDGET) -> bool:
+    """
+    Checks that each of the given modules is imported within the budget and without importing the
+    plotting stack.
+
+    Args:
+        modules (List[str]): Modules to check. If None, the HEADLESS_MODULES are checked.
+        budget (float): Maximum import time in seconds of each module.
+
+    Returns:
+        bool: Whether all the modules passed the check.
+    """
+    if modules is None:
+        modules = HEADLESS_MODULES
+
+    passed = True
+    for module in modules:
+        seconds, plotting_modules = import_time(module)
+        ok = seconds <= budget and not plotting_modules
+        passed = passed and ok
+        print(f"{'OK  ' if ok else 'FAIL'} {module}: {seconds:.3f}s"
+              f"{f' (imported {plotting_modules})' if plotting_modules else ''}")
+
+    return passed
+
+
+if __name__ == '__main__':
+    sys.exit(0 if check_import_times() else 1)
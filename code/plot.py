@@ -3,13 +3,16 @@ This module contains the plotting methods and can be inherited using the PlotStu
 """
 
 from dataclasses import dataclass
-from typing import List, Tuple, Union
+from typing import TYPE_CHECKING, List, Tuple, Union
 
-import matplotlib.pylab as plt
-import numpy as np
 import pandas as pd
-import seaborn as sns
-from matplotlib.axes import Axes
+
+from distribution import Distribution
+from plotdata import groupby_plot_data, time_series_plot_data
+
+# The plotting stack is only imported when a plot method is called
+if TYPE_CHECKING:
+    from matplotlib.axes import Axes
 
 Column = Tuple[str]
 
@@ -26,6 +29,10 @@ class PlotStudyMixin():
     plot_kind: str = 'hist'  #'kde'
     plot_bins: int = 20
     plot_kwargs: dict = None
+    distribution: Distribution = None
+
+    # --time series
+    plot_max_points: int = 200
 
     # --relationships
     plot_correlation_plots: bool = False
@@ -114,14 +121,30 @@ class PlotStudyMixin():
             columns = [columns]
         return self.complete_columns(columns, df)
 
-    def parameter_plots(self) -> List[Axes]:
+    def calc_distribution(self, edges: pd.DataFrame = None) -> Distribution:
+        """
+        Computes the value distributions of the study parameters, with shared bin edges for
+        each study group, or the given fixed 'edges' (e.g. of a previously saved Distribution).
+        They are computed only once and saved in the `distribution` attribute.
+        """
+        if self.distribution is None:
+            self.distribution = Distribution.from_df(self.data,
+                                                     self.study_groups,
+                                                     bins=self.plot_bins,
+                                                     edges=edges)
+        return self.distribution
+
+    def parameter_plots(self) -> List['Axes']:
         """
         Plots regarding the parameters themselves.
         """
 
+        import matplotlib.pylab as plt
+
         print("Plot parameter distributions.")
 
         plot_axes = []
+        distribution = self.calc_distribution()
 
         for group in self.study_groups:
             num_subplots = len(group)
@@ -131,24 +154,35 @@ class PlotStudyMixin():
                                            (num_subplots - 0.5)))
             for c, col in enumerate(group):
 
-                try:
-                    self.data[col].plot(title=f'Value distribution for: {col}',
-                                        ax=axs[c],
-                                        **self.plot_kwargs)
-                    plt.plot()
-                except:
-                    plt.plot(title=f'EMPTY distribution for: {col}')
+                if distribution.is_empty(col):
+                    axs[c].set_title(f'EMPTY distribution for: {col}')
+                elif self.plot_kind == 'hist':
+                    counts, edges = distribution.histogram(col)
+                    axs[c].stairs(counts, edges, fill=True)
+                    axs[c].set_title(f'Value distribution for: {col}')
+                else:
+                    # e.g. the kde of a constant column is singular (LinAlgError is a ValueError)
+                    try:
+                        self.data[col].plot(
+                            title=f'Value distribution for: {col}',
+                            ax=axs[c],
+                            **self.plot_kwargs)
+                    except (TypeError, ValueError):
+                        axs[c].set_title(f'EMPTY distribution for: {col}')
 
             plot_axes.append(axs)
             plt.show()
 
         return plot_axes
 
-    def relationship_plots(self) -> List[Axes]:
+    def relationship_plots(self) -> List['Axes']:
         """
         Plots regarding the relationships between parameters.
         """
 
+        import matplotlib.pylab as plt
+        import seaborn as sns
+
         print("Plot parameter relationships.")
 
         rel_axes = []
@@ -170,22 +204,32 @@ class PlotStudyMixin():
 
         return rel_axes
 
-    def parameters_by_country_plots(self) -> List[Axes]:
+    def parameters_by_country_plots(self,
+                                    countries: List[str] = None
+                                    ) -> List['Axes']:
         """
-        Plot the parameters of each country.
+        Plot the parameters of each country, or only of the given countries, e.g. the countries
+        of a `SnapshotDiff`.
         """
 
+        import matplotlib.pylab as plt
+
         print("Plot parameters for each country.")
 
         plot_axes = []
         param_groups_vs_time = self.study_groups
-        for country in set(self.data.index.get_level_values(1)):
+        country_values = self.data.index.get_level_values(1)
+        if countries is not None:
+            country_values = country_values.where(
+                country_values.isin(countries))
+
+        # Split the data by country once instead of scanning it for each plot
+        for country, df_country in self.data.groupby(country_values,
+                                                     sort=False):
+            df_country = df_country.droplevel(1)
             for param_group in param_groups_vs_time:
-                # Get df only for country, the group of parameters and remove index level for the country
-                df_to_plot = self.data.loc[
-                    self.data.index.get_level_values(1) == country,
-                    param_group].reset_index('country').drop(
-                        columns=['country'])
+                # Get df only for the group of parameters
+                df_to_plot = df_country.loc[:, param_group]
 
                 # Skip if empty, all values are null or not minimum data points
                 if df_to_plot.empty:
@@ -195,43 +239,53 @@ class PlotStudyMixin():
                 if len(df_to_plot) < self.min_datapoints_in_country:
                     continue
 
-                # Plot
-                plt.figure()
-                ax = df_to_plot.plot(title=country)
+                # Plot the series decimated to the maximum number of points, with matplotlib
+                # directly to avoid the axis post-processing of pandas for each series
+                plot_data = time_series_plot_data(df_to_plot,
+                                                  self.plot_max_points)
+                _, ax = plt.subplots()
+                for col, series in plot_data.items():
+                    label = col
+                    if isinstance(col, tuple):
+                        label = '_'.join((par for par in col if par != ""))
+                    ax.plot(series.index, series.to_numpy(), label=label)
+                ax.set_title(country)
+                ax.legend()
                 plt.show()
 
                 plot_axes.append(ax)
 
         return plot_axes
 
-    def groupby_parameter_plots(self) -> List[Axes]:
+    def groupby_parameter_plots(self) -> List['Axes']:
         """
         Plots regarding the parameters themselves.
         """
 
+        import matplotlib.pylab as plt
+
         print("Plot parameters from groupby.")
 
+        plot_data = groupby_plot_data(self.groupby_data.data)
+        if not plot_data:
+            return []
+
+        # One panel per groupby column
+        num_subplots = len(plot_data)
+        _, axs = plt.subplots(num_subplots,
+                              1,
+                              figsize=(self.plot_size,
+                                       self.plot_size * num_subplots / 2),
+                              squeeze=False)
         plot_axes = []
-        data = self.groupby_data.data
-        for col in data.columns:
-            plt.figure()
-            xy_values = np.array(
-                [[x, y] for (x, y) in zip(data.index.values, data[col].values)
-                 if not pd.isnull(x) and not pd.isnull(y)],
-                dtype='object')
-
-            if xy_values.size != 0:
-                df_to_plot = pd.DataFrame(xy_values[:, 1],
-                                          columns=[col],
-                                          index=xy_values[:, 0]).T
-                ax = df_to_plot.plot(title=col, kind='bar')
-                plot_axes.append(ax)
-
-            plt.show()
+        for ax, (col, series) in zip(axs[:, 0], plot_data.items()):
+            series.plot(title=col, kind='bar', ax=ax)
+            plot_axes.append(ax)
+        plt.show()
 
         return plot_axes
 
-    def plot(self) -> List[Axes]:
+    def plot(self) -> List['Axes']:
         """
         Plots as defined in the flags.
         """
@@ -0,0 +1,143 @@
+"""
+This module contains the preparation of the data to be plotted, which doesn't need the plotting
+stack: null removal and Largest-Triangle-Three-Buckets (LTTB) decimation of long series.
+"""
+
+from typing import Dict, Tuple
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_numeric_dtype
+
+Column = Tuple[str]
+
+
+def drop_null_points(series: pd.Series) -> pd.Series:
+    """
+    Returns the series without the points whose index or value is null, keeping its dtype.
+    """
+    mask = series.notna().to_numpy() & series.index.notna()
+    return series[mask]
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, max_points: int) -> np.ndarray:
+    """
+    Returns the indices of the points selected by the Largest-Triangle-Three-Buckets algorithm.
+
+    The first and last points are always kept and the rest are split in `max_points - 2`
+    buckets. From each bucket the point that forms the largest triangle with the point selected
+    in the previous bucket and the average point of the next bucket is selected.
+
+    Args:
+        x (np.ndarray): Increasing x values of the points.
+        y (np.ndarray): Y values of the points.
+        max_points (int): Number of points to select.
+
+    Returns:
+        np.ndarray: Sorted indices of the selected points.
+    """
+    n = len(x)
+    if max_points >= n or max_points < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    # Buckets between the first and the last point, and the average point of each of them
+    edges = np.linspace(1, n - 1, max_points - 1).astype(np.int64)
+    starts, stops = edges[:-1], edges[1:]
+    sizes = stops - starts
+    avg_x = np.append(np.add.reduceat(x[:-1], starts) / sizes, x[-1])
+    avg_y = np.append(np.add.reduceat(y[:-1], starts) / sizes, y[-1])
+
+    indices = np.empty(max_points, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    a = 0
+    for b, (start, stop) in enumerate(zip(starts, stops)):
+        areas = np.abs((x[a] - avg_x[b + 1]) * (y[start:stop] - y[a]) -
+                       (x[a] - x[start:stop]) * (avg_y[b + 1] - y[a]))
+        a = start + int(np.argmax(areas))
+        indices[b + 1] = a
+
+    return indices
+
+
+def decimate(series: pd.Series, max_points: int) -> pd.Series:
+    """
+    Returns the series reduced to 'max_points' non-null points with LTTB.
+
+    The null points are dropped, except the first one of each gap between the selected points,
+    so that the line drawn from the result still breaks at the gaps of the series.
+
+    Args:
+        series (pd.Series): Series to decimate, with an increasing index.
+        max_points (int): Maximum number of non-null points to keep. If None, all are kept.
+
+    Returns:
+        pd.Series: Decimated series.
+    """
+    series = series[series.index.notna()]
+    is_null = series.isna().to_numpy()
+    selected = np.flatnonzero(~is_null)
+
+    if max_points is not None and len(selected) > max_points:
+        values = series.iloc[selected]
+        x = np.arange(len(values), dtype=np.float64)
+        if isinstance(values.index, pd.DatetimeIndex):
+            x = values.index.asi8.astype(np.float64)
+        elif is_numeric_dtype(values.index):
+            x = values.index.to_numpy(dtype=np.float64)
+        selected = selected[lttb_indices(x, values.to_numpy(dtype=np.float64),
+                                         max_points)]
+
+    # First null point after each selected point followed by a gap
+    nulls = np.flatnonzero(is_null)
+    gap_counts = np.cumsum(is_null)[selected]
+    gap_starts = nulls[gap_counts[:-1][np.diff(gap_counts) != 0]]
+
+    return series.iloc[np.sort(np.concatenate([selected, gap_starts]))]
+
+
+def time_series_plot_data(df: pd.DataFrame,
+                          max_points: int = None) -> Dict[Column, pd.Series]:
+    """
+    Prepares the columns of a dataframe indexed by date to be plotted as time series.
+
+    Args:
+        df (pd.DataFrame): Data indexed by date.
+        max_points (int): Maximum number of points of each series. If None, all are kept.
+
+    Returns:
+        Dict[Column, pd.Series]: Decimated series of each non empty numeric column, with a null
+            point at each gap.
+    """
+    df = df.set_axis(pd.to_datetime(df.index), axis=0).sort_index()
+    plot_data = {}
+    for col in df.columns:
+        if not is_numeric_dtype(df[col]):
+            continue
+        series = decimate(df[col], max_points)
+        if series.notna().any():
+            plot_data[col] = series
+    return plot_data
+
+
+def groupby_plot_data(df: pd.DataFrame) -> Dict[Column, pd.Series]:
+    """
+    Prepares the columns of the grouped data to be plotted by group.
+
+    Args:
+        df (pd.DataFrame): Grouped data.
+
+    Returns:
+        Dict[Column, pd.Series]: Series without null points of each non empty numeric column.
+    """
+    plot_data = {}
+    for col in df.columns:
+        series = df[col].infer_objects()
+        if not is_numeric_dtype(series):
+            continue
+        series = drop_null_points(series)
+        if not series.empty:
+            plot_data[col] = series
+    return plot_data
@@ -0,0 +1,239 @@
+"""
+This module contains the ScenarioRunner class that allows to run many study configurations
+over the same dataset, loading and preparing the shared data only once.
+"""
+
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, Hashable, List, Tuple, Type
+
+import pandas as pd
+
+from study import CovidByCountryStudy, CovidCountryStudy
+
+# Study keyword arguments that are resolved in the shared pipeline stages.
+STAGE_KWARGS = ('downsampling', 'countries_to_study', 'country_data',
+                'country_filter')
+
+StageKey = Tuple[int, Tuple[str]]
+
+
+@dataclass
+class Scenario():
+    """
+    One configuration to run: the keyword arguments for the `CovidCountryStudy` and, optionally,
+    for the `CovidCountryStudyGroupby` and `CovidByCountryStudy` built from it.
+    """
+
+    name: str
+    study_kwargs: dict = None
+    groupby_kwargs: dict = None
+    by_country_kwargs: dict = None
+
+    def __post_init__(self):
+
+        if self.study_kwargs is None:
+            self.study_kwargs = {}
+        if self.by_country_kwargs is None:
+            self.by_country_kwargs = {}
+
+    @property
+    def downsampling(self) -> int:
+        return self.study_kwargs.get('downsampling',
+                                     CovidCountryStudy.downsampling)
+
+    @property
+    def countries_to_study(self) -> List[str]:
+        """
+        Countries to study as `CovidStudyMixin.set_countries_to_study` would resolve them.
+        """
+        countries = self.study_kwargs.get('countries_to_study')
+        if countries is None or isinstance(countries, list):
+            return countries
+
+        country_data = self.study_kwargs.get('country_data')
+        country_filter = self.study_kwargs.get('country_filter')
+        if country_data is None or not isinstance(country_filter, dict):
+            return countries
+
+        return CovidCountryStudy.countries_from_filter(country_data,
+                                                       country_filter)
+
+    @property
+    def stage_key(self) -> StageKey:
+        countries = self.countries_to_study
+        if countries is not None:
+            countries = tuple(sorted(countries))
+        return self.downsampling, countries
+
+    @property
+    def tail_key(self) -> Hashable:
+        study_kwargs = {
+            k: v
+            for k, v in self.study_kwargs.items() if k not in STAGE_KWARGS
+        }
+        return (freeze(study_kwargs), freeze(self.groupby_kwargs),
+                freeze(self.by_country_kwargs))
+
+
+@dataclass
+class ScenarioResult():
+    """
+    The results of running a Scenario.
+    """
+
+    study: CovidCountryStudy = None
+    by_country_study: CovidByCountryStudy = None
+
+
+@dataclass
+class ScenarioRunner():
+    """
+    Runs a list of scenarios over the same `data`.
+
+    The data is loaded and its columns and indexes prepared only once. After that, the shared
+    pipeline stages (downsampling and then country filtering, in the same order as in
+    `CovidCountryStudy`) are computed once per distinct value and the distinct tails (study
+    and groupby) of all scenarios are run in parallel in the `executor` workers.
+
+    The tails are mostly pure-python pandas work that holds the GIL, so they are run in
+    separate processes by default. The scenarios (e.g. the groupby functions) must then be
+    picklable; pass `executor=ThreadPoolExecutor` to run them with lambdas instead.
+    """
+
+    data: pd.DataFrame = None
+    scenarios: List[Scenario] = None
+
+    # Workers
+    executor: Type[Executor] = ProcessPoolExecutor
+    max_workers: int = None
+
+    # Stage caches
+    _downsampled: Dict[int, pd.DataFrame] = field(default_factory=dict,
+                                                  init=False,
+                                                  repr=False)
+    _filtered: Dict[StageKey, pd.DataFrame] = field(default_factory=dict,
+                                                    init=False,
+                                                    repr=False)
+
+    def __post_init__(self):
+
+        if self.scenarios is None:
+            self.scenarios = []
+
+        names = [scenario.name for scenario in self.scenarios]
+        duplicated = sorted({name for name in names if names.count(name) > 1})
+        if duplicated:
+            raise ValueError(f"Scenario names must be unique: {duplicated}")
+
+        # Prepare columns and indexes once for all scenarios
+        self.data = CovidCountryStudy(data=self.data, downsampling=1).data
+
+    def downsampled_data(self, downsampling: int) -> pd.DataFrame:
+        """
+        Returns the data downsampled as `Study` does, computing it only once for each value.
+        """
+        if downsampling not in self._downsampled:
+            data = self.data
+            if downsampling != 1:
+                data = data.iloc[::downsampling]
+            self._downsampled[downsampling] = data
+        return self._downsampled[downsampling]
+
+    def stage_data(self, scenario: Scenario) -> pd.DataFrame:
+        """
+        Returns the data of the scenario after the shared pipeline stages, computing it only
+        once for each distinct stage key.
+        """
+        key = scenario.stage_key
+        if key not in self._filtered:
+            downsampling, countries = key
+            data = self.downsampled_data(downsampling)
+            if countries is not None:
+                mask_country = data.index.get_level_values('country').isin(
+                    countries)
+                data = data.loc[mask_country]
+            self._filtered[key] = data
+        return self._filtered[key]
+
+    def run(self) -> Dict[str, ScenarioResult]:
+        """
+        Runs all the scenarios and returns their results by name.
+
+        Scenarios with identical configurations share the same ScenarioResult instance.
+        """
+        futures = {}
+        keys_by_name = {}
+        with self.executor(max_workers=self.max_workers) as pool:
+            for scenario in self.scenarios:
+                key = (scenario.stage_key, scenario.tail_key)
+                keys_by_name[scenario.name] = key
+                if key not in futures:
+                    futures[key] = pool.submit(run_scenario_tail,
+                                               self.stage_data(scenario),
+                                               scenario)
+
+            return {
+                name: futures[key].result()
+                for name, key in keys_by_name.items()
+            }
+
+    @classmethod
+    def from_csv(cls, path: str, **kwargs) -> 'ScenarioRunner':
+        """
+        Create instance from given path.
+        """
+        return cls(data=pd.read_csv(path), **kwargs)
+
+
+def run_scenario_tail(data: pd.DataFrame,
+                      scenario: Scenario) -> ScenarioResult:
+    """
+    Builds the study of the scenario from its already prepared data and, if the scenario has
+    `groupby_kwargs`, the CovidByCountryStudy from it.
+
+    Args:
+        data (pd.DataFrame): Data of the scenario after the shared pipeline stages.
+        scenario (Scenario): Scenario to run.
+
+    Returns:
+        ScenarioResult: Results of the scenario.
+    """
+    study_kwargs = {
+        k: v
+        for k, v in scenario.study_kwargs.items() if k not in STAGE_KWARGS
+    }
+    study = CovidCountryStudy(data=data, downsampling=1, **study_kwargs)
+
+    # Record the stage parameters as if the study had applied them itself
+    study.downsampling = scenario.downsampling
+    study.country_data = scenario.study_kwargs.get('country_data')
+    study.country_filter = scenario.study_kwargs.get('country_filter')
+    study.countries_to_study = scenario.countries_to_study
+
+    result = ScenarioResult(study=study)
+    if scenario.groupby_kwargs is not None:
+        result.by_country_study = CovidByCountryStudy.from_study(
+            study,
+            groupby_kwargs=scenario.groupby_kwargs,
+            **scenario.by_country_kwargs)
+    return result
+
+
+def freeze(obj) -> Hashable:
+    """
+    Returns a hashable version of the given (possibly nested) keyword arguments.
+    Unhashable values (e.g. arrays or DataFrames) are identified by their id, so that only
+    scenarios sharing the same object are deduplicated.
+    """
+    if isinstance(obj, dict):
+        return tuple(sorted((k, freeze(v)) for k, v in obj.items()))
+    if isinstance(obj, (list, tuple)):
+        return tuple(freeze(v) for v in obj)
+    if isinstance(obj, set):
+        return frozenset(freeze(v) for v in obj)
+    try:
+        hash(obj)
+    except TypeError:
+        return ('id', id(obj))
+    return obj
@@ -0,0 +1,271 @@
+"""
+This module contains the SimilarityIndex class that finds the countries with the most similar
+trajectories of a parameter, under the Euclidean or the Dynamic Time Warping (DTW) distance.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+Column = Tuple[str]
+
+METRICS = ('euclidean', 'dtw')
+
+
+@dataclass
+class SimilarityIndex():
+    """
+    Z-normalized series of each country on a common time grid, saved as a dense
+    country x time DataFrame for each parameter in `matrices`.
+
+    The k-nearest-neighbour queries compute the distances to all the countries at once. With the
+    DTW distance, restricted to a band of `window` steps, the candidates are first sorted by
+    their LB_Keogh lower bound and the DTW distance is only computed, in batches, for the
+    candidates whose lower bound is below the current k-th best distance.
+    """
+
+    matrices: Dict[Column, pd.DataFrame] = None
+
+    # DTW parameters
+    window: int = 4
+    batch_size: int = 32
+
+    def matrix(self, parameter: Column) -> pd.DataFrame:
+        """
+        Returns the country x time matrix of the given parameter.
+        """
+        return self.matrices[parameter]
+
+    def is_indexed(self, parameter: Column, country: str) -> bool:
+        """
+        Returns whether the given country is in the index of the given parameter.
+        """
+        if parameter not in self.matrices:
+            print(f"Parameter {parameter} isn't indexed!")
+            return False
+        if country not in self.matrices[parameter].index:
+            print(
+                f"Country '{country}' isn't in the {parameter} index, it may have been left "
+                "out for having too few values!")
+            return False
+        return True
+
+    def distances(self,
+                  parameter: Column,
+                  country: str,
+                  metric: str = 'euclidean') -> pd.Series:
+        """
+        Returns the distance between the series of the given country and all the countries.
+
+        Args:
+            parameter (Column): Parameter of the series.
+            country (str): Country to compare with.
+            metric (str): Either 'euclidean' or 'dtw'.
+
+        Returns:
+            pd.Series: Distance to each country.
+        """
+        if not self.is_indexed(parameter, country):
+            return None
+        matrix = self.matrix(parameter)
+        query = matrix.loc[country].to_numpy()
+        candidates = matrix.to_numpy()
+        if metric == 'euclidean':
+            values = euclidean_distances(query, candidates)
+        elif metric == 'dtw':
+            values = dtw_distances(query, candidates, self.window)
+        else:
+            print(f"Unknown metric '{metric}', use one of {METRICS}!")
+            return None
+        return pd.Series(values, index=matrix.index, name=metric)
+
+    def nearest(self,
+                parameter: Column,
+                country: str,
+                k: int = 5,
+                metric: str = 'euclidean') -> pd.Series:
+        """
+        Returns the 'k' countries with the most similar series to the given one.
+
+        Args:
+            parameter (Column): Parameter of the series.
+            country (str): Country to compare with.
+            k (int): Number of countries to return.
+            metric (str): Either 'euclidean' or 'dtw'.
+
+        Returns:
+            pd.Series: Distance of the nearest countries, sorted from the nearest one.
+        """
+        if metric != 'dtw':
+            distances = self.distances(parameter, country, metric)
+            if distances is None:
+                return None
+            return distances.drop(country).nsmallest(k)
+
+        if not self.is_indexed(parameter, country):
+            return None
+        matrix = self.matrix(parameter).drop(country)
+        query = self.matrix(parameter).loc[country].to_numpy()
+        candidates = matrix.to_numpy()
+
+        # Compute the DTW distance only for candidates that could be among the k nearest
+        lower_bounds = lb_keogh(query, candidates, self.window)
+        order = np.argsort(lower_bounds)
+        distances = np.full(len(candidates), np.inf)
+        kth_best = np.inf
+        for start in range(0, len(order), self.batch_size):
+            batch = order[start:start + self.batch_size]
+            batch = batch[lower_bounds[batch] < kth_best]
+            if batch.size == 0:
+                break
+            distances[batch] = dtw_distances(query, candidates[batch],
+                                             self.window)
+            kth_best = np.sort(distances)[min(k, len(distances)) - 1]
+
+        return pd.Series(distances, index=matrix.index,
+                         name=metric).nsmallest(k)
+
+    def distance_matrix(self,
+                        parameter: Column,
+                        metric: str = 'euclidean') -> pd.DataFrame:
+        """
+        Returns the distance between the series of every pair of countries, e.g. for clustering.
+
+        Args:
+            parameter (Column): Parameter of the series.
+            metric (str): Either 'euclidean' or 'dtw'.
+
+        Returns:
+            pd.DataFrame: Symmetric country x country distance matrix.
+        """
+        if parameter not in self.matrices:
+            print(f"Parameter {parameter} isn't indexed!")
+            return None
+        matrix = self.matrix(parameter)
+        values = matrix.to_numpy()
+        if metric == 'euclidean':
+            squared_norms = (values**2).sum(axis=1)
+            distances = np.sqrt(
+                np.maximum(
+                    squared_norms[:, None] + squared_norms[None, :] -
+                    2 * values @ values.T, 0))
+        elif metric == 'dtw':
+            distances = np.zeros((len(values), len(values)))
+            for i in range(len(values) - 1):
+                distances[i, i + 1:] = dtw_distances(values[i],
+                                                     values[i + 1:],
+                                                     self.window)
+            distances += distances.T
+        else:
+            print(f"Unknown metric '{metric}', use one of {METRICS}!")
+            return None
+        np.fill_diagonal(distances, 0)
+        return pd.DataFrame(distances, index=matrix.index, columns=matrix.index)
+
+    @classmethod
+    def from_df(cls,
+                df: pd.DataFrame,
+                parameters: List[Column],
+                freq: str = 'W',
+                min_points: int = 5,
+                **kwargs) -> 'SimilarityIndex':
+        """
+        Create instance from the given data indexed by date and country.
+
+        The series of each country are resampled to the common 'freq' grid, their gaps are
+        interpolated and they are z-normalized. The countries with less than 'min_points' values
+        on the grid are left out. With downsampling, each country only has a value in some of the
+        grid steps, so the number of values is checked instead of the fraction of the grid.
+
+        Args:
+            df (pd.DataFrame): Data indexed by date and country.
+            parameters (List[Column]): Parameters to index.
+            freq (str): Frequency of the common time grid.
+            min_points (int): Minimum number of values of a country on the grid.
+
+        Returns:
+            SimilarityIndex: Index of the given parameters.
+        """
+        matrices = {}
+        for parameter in parameters:
+            series = df[parameter].unstack('country')
+            series.index = pd.to_datetime(series.index)
+            series = series.resample(freq).mean()
+
+            enough_points = series.notna().sum() >= min_points
+            if not enough_points.all():
+                print(
+                    f"Left out of the {parameter} index for having less than {min_points} "
+                    f"values: {enough_points.index[~enough_points].tolist()}")
+            series = series.loc[:, enough_points]
+            series = series.interpolate(limit_direction='both')
+
+            std = series.std(ddof=0).replace(0, 1)
+            matrices[parameter] = ((series - series.mean()) / std).T
+
+        return cls(matrices=matrices, **kwargs)
+
+
+def euclidean_distances(query: np.ndarray,
+                        candidates: np.ndarray) -> np.ndarray:
+    """
+    Returns the Euclidean distance between the query series and each of the candidate series.
+    """
+    return np.sqrt(((candidates - query)**2).sum(axis=1))
+
+
+def lb_keogh(query: np.ndarray, candidates: np.ndarray,
+             window: int) -> np.ndarray:
+    """
+    Returns the LB_Keogh lower bound of the DTW distance, restricted to a band of 'window' steps,
+    between the query series and each of the candidate series.
+    """
+    n = len(query)
+    if window is None:
+        window = n
+    padded = np.pad(query, window, mode='edge')
+    windows = np.lib.stride_tricks.sliding_window_view(padded,
+                                                       2 * window + 1)[:n]
+    upper, lower = windows.max(axis=1), windows.min(axis=1)
+
+    above = np.maximum(candidates - upper, 0)
+    below = np.maximum(lower - candidates, 0)
+    return np.sqrt((above**2 + below**2).sum(axis=1))
+
+
+def dtw_distances(query: np.ndarray, candidates: np.ndarray,
+                  window: int) -> np.ndarray:
+    """
+    Returns the DTW distance, restricted to a band of 'window' steps, between the query series
+    and each of the candidate series. All the candidates are computed at once.
+
+    Args:
+        query (np.ndarray): Series of length n.
+        candidates (np.ndarray): Series of shape (m, n).
+        window (int): Maximum shift between the matched steps. If None, it's unrestricted.
+
+    Returns:
+        np.ndarray: Distance to each of the candidates.
+    """
+    n = len(query)
+    if window is None:
+        window = n
+
+    # Only the previous and the current rows of the cumulative cost matrix are kept, and the
+    # costs are computed only inside the band, so the memory is O(m * n)
+    previous = np.full((len(candidates), n + 1), np.inf)
+    previous[:, 0] = 0
+    current = np.empty_like(previous)
+    for i in range(1, n + 1):
+        start, stop = max(1, i - window), min(n, i + window)
+        costs = (candidates[:, start - 1:stop] - query[i - 1])**2
+        current[:] = np.inf
+        for j in range(start, stop + 1):
+            current[:, j] = costs[:, j - start] + np.minimum(
+                np.minimum(previous[:, j], current[:, j - 1]),
+                previous[:, j - 1])
+        previous, current = current, previous
+
+    return np.sqrt(previous[:, n])
@@ -0,0 +1,177 @@
+"""
+This module contains the Snapshot class that fingerprints a version of the data, so that a new
+version can be compared with it and only the countries that changed have to be recomputed.
+"""
+
+from dataclasses import dataclass
+from typing import List
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_bool_dtype, is_numeric_dtype
+
+# Columns with the row numbers of the csv, which change whenever a row is inserted
+ROW_NUMBER_COLUMNS = ('Unnamed: 0', 'level_0', 'index')
+
+
+@dataclass
+class SnapshotDiff():
+    """
+    Rows (as a (country, date) MultiIndex) inserted, revised and deleted between two snapshots.
+    """
+
+    inserted: pd.MultiIndex = None
+    revised: pd.MultiIndex = None
+    deleted: pd.MultiIndex = None
+
+    @property
+    def countries(self) -> List[str]:
+        """
+        Countries with any inserted, revised or deleted row.
+        """
+        return sorted(
+            set(self.inserted.get_level_values(0)) |
+            set(self.revised.get_level_values(0)) |
+            set(self.deleted.get_level_values(0)))
+
+    @property
+    def empty(self) -> bool:
+        return not (len(self.inserted) or len(self.revised)
+                    or len(self.deleted))
+
+
+@dataclass
+class Snapshot():
+    """
+    Fingerprint of a version of the data: a hash of each (country, date) row and a hash of the
+    block of rows of each country.
+    """
+
+    row_hashes: pd.Series = None
+    country_hashes: pd.Series = None
+
+    # Indexes
+    country_header: str = 'country'
+    date_header: str = 'date'
+
+    def __post_init__(self):
+
+        if self.country_hashes is None and self.row_hashes is not None:
+            self.country_hashes = self.calc_country_hashes(self.row_hashes)
+
+    @staticmethod
+    def calc_country_hashes(row_hashes: pd.Series) -> pd.Series:
+        """
+        Combines the hashes of the rows of each country into one hash per country.
+
+        The hash of each row is first hashed again together with the hash of its date, so that
+        moving values between dates changes the result, and then all of them are XOR-ed, so
+        that the result doesn't depend on the order of the rows.
+        """
+        row_hashes = row_hashes.sort_index(level=0)
+        countries = row_hashes.index.get_level_values(0)
+        dates = pd.util.hash_array(
+            row_hashes.index.get_level_values(1).to_numpy())
+        hashes = pd.util.hash_array(row_hashes.to_numpy() ^ dates)
+
+        is_start = np.r_[True, countries[1:] != countries[:-1]]
+        starts = np.flatnonzero(is_start)
+        return pd.Series(np.bitwise_xor.reduceat(hashes, starts),
+                         index=countries[starts],
+                         name='hash')
+
+    def diff(self, new: 'Snapshot') -> SnapshotDiff:
+        """
+        Compares the given newer snapshot with this one.
+
+        Only the rows of the countries whose block hash differs are compared.
+
+        Args:
+            new (Snapshot): Newer snapshot.
+
+        Returns:
+            SnapshotDiff: Rows inserted, revised and deleted in the new snapshot.
+        """
+        old_blocks, new_blocks = self.country_hashes, new.country_hashes
+        countries = old_blocks.index.union(new_blocks.index)
+        changed = (old_blocks.reindex(countries) !=
+                   new_blocks.reindex(countries)).to_numpy()
+        changed = countries[changed]
+
+        old_rows = self.row_hashes[self.row_hashes.index.get_level_values(
+            0).isin(changed)]
+        new_rows = new.row_hashes[new.row_hashes.index.get_level_values(
+            0).isin(changed)]
+
+        common = old_rows.index.intersection(new_rows.index)
+        revised = common[(old_rows.loc[common] !=
+                          new_rows.loc[common]).to_numpy()]
+
+        return SnapshotDiff(inserted=new_rows.index.difference(old_rows.index),
+                            revised=revised,
+                            deleted=old_rows.index.difference(new_rows.index))
+
+    def save(self, path: str):
+        """
+        Saves the row hashes to the given csv path.
+        """
+        self.row_hashes.to_csv(path)
+
+    @classmethod
+    def from_df(cls,
+                df: pd.DataFrame,
+                columns: List[str] = None,
+                **kwargs) -> 'Snapshot':
+        """
+        Create instance from the given DataFrame, with 'country' and 'date' columns or indexes.
+
+        Args:
+            df (pd.DataFrame): Data to fingerprint.
+            columns (List[str]): Columns to hash. If None, all of them except the indexes and the
+                ROW_NUMBER_COLUMNS are hashed.
+
+        Returns:
+            Snapshot: Fingerprint of the data.
+        """
+        country_header = kwargs.get('country_header', cls.country_header)
+        date_header = kwargs.get('date_header', cls.date_header)
+
+        indexes = [country_header, date_header]
+        indexes_to_reset = [name for name in indexes if name in df.index.names]
+        if indexes_to_reset:
+            df = df.reset_index(indexes_to_reset)
+        if columns is None:
+            columns = [
+                col for col in df.columns
+                if col not in indexes and col not in ROW_NUMBER_COLUMNS
+            ]
+
+        # Hash all numbers as floats, so that e.g. an int column that gets a null value in the
+        # next export (and becomes a float one) doesn't revise all the rows
+        values = df[columns].apply(lambda col: col.astype(np.float64)
+                                   if is_numeric_dtype(col) and
+                                   not is_bool_dtype(col) else col)
+        row_hashes = pd.Series(
+            pd.util.hash_pandas_object(values, index=False).to_numpy(),
+            index=pd.MultiIndex.from_frame(df[indexes].astype(str)),
+            name='hash')
+        return cls(row_hashes=row_hashes, **kwargs)
+
+    @classmethod
+    def from_csv(cls, path: str, **kwargs) -> 'Snapshot':
+        """
+        Create instance from the given data csv path.
+        """
+        return cls.from_df(pd.read_csv(path), **kwargs)
+
+    @classmethod
+    def from_path(cls, path: str, **kwargs) -> 'Snapshot':
+        """
+        Load instance from the row hashes csv path written by `save`.
+        """
+        row_hashes = pd.read_csv(path,
+                                 index_col=[0, 1],
+                                 dtype={'hash': np.uint64})['hash']
+        row_hashes.index = row_hashes.index.set_levels(
+            [level.astype(str) for level in row_hashes.index.levels])
+        return cls(row_hashes=row_hashes, **kwargs)
@@ -0,0 +1,290 @@
+"""
+This module contains the ColumnStore class that keeps each column of a dataset as a memory-mapped
+array on disk, so that studies can work with datasets that don't fit in memory.
+"""
+
+import json
+import os
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_numeric_dtype, union_categoricals
+
+from snapshot import ROW_NUMBER_COLUMNS
+
+META_FILE = 'meta.json'
+DATE_FILE = 'date.npy'
+
+# Number of rows copied at once when sorting a column
+SORT_BLOCK_SIZE = 1_000_000
+
+
+@dataclass
+class ColumnStore():
+    """
+    Dataset stored in the directory `path` as one memory-mapped `.npy` array per column.
+
+    The rows are sorted by country and then by date, and the `offsets` table maps each country
+    to its (start, stop) row range. Only the selected rows are read from disk and materialized
+    as a pandas.DataFrame, with the same 'date' and 'country' columns as the original csv.
+    """
+
+    path: str = None
+    country_header: str = 'country'
+    date_header: str = 'date'
+
+    # Metadata
+    columns: List[str] = field(default=None, init=False)
+    offsets: Dict[str, Tuple[int, int]] = field(default=None,
+                                                init=False,
+                                                repr=False)
+
+    def __post_init__(self):
+
+        with open(os.path.join(self.path, META_FILE)) as f:
+            meta = json.load(f)
+        self.columns = meta['columns']
+        self.offsets = {
+            country: tuple(rows)
+            for country, rows in meta['offsets'].items()
+        }
+
+    @property
+    def countries(self) -> List[str]:
+        return list(self.offsets)
+
+    def __len__(self) -> int:
+        return max((stop for _, stop in self.offsets.values()), default=0)
+
+    def array(self, column: str) -> np.ndarray:
+        """
+        Returns the memory-mapped array of the given column.
+        """
+        if column == self.date_header:
+            return np.load(os.path.join(self.path, DATE_FILE), mmap_mode='r')
+        return np.load(os.path.join(self.path,
+                                    column_file(self.columns.index(column))),
+                       mmap_mode='r')
+
+    def rows(self,
+             countries: List[str] = None,
+             downsampling: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the rows of the given countries, taking one of every 'downsampling' dates within
+        each country, and the country of each of those rows.
+
+        Args:
+            countries (List[str]): Countries to select. If None, all are selected.
+            downsampling (int): Step between the selected dates of each country.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Selected row numbers and their countries.
+        """
+        if countries is None:
+            countries = self.countries
+        countries = set(countries)
+        countries = [c for c in self.countries if c in countries]
+
+        ranges = [range(*self.offsets[c], downsampling) for c in countries]
+        if not ranges:
+            return np.array([], dtype=np.int64), np.array([], dtype=object)
+
+        rows = np.concatenate(
+            [np.arange(r.start, r.stop, r.step) for r in ranges])
+        row_countries = np.repeat(np.array(countries, dtype=object),
+                                  [len(r) for r in ranges])
+        return rows, row_countries
+
+    def to_frame(self,
+                 countries: List[str] = None,
+                 downsampling: int = 1,
+                 columns: List[str] = None) -> pd.DataFrame:
+        """
+        Materializes the selected rows and columns as a pandas.DataFrame.
+
+        Args:
+            countries (List[str]): Countries to select. If None, all are selected.
+            downsampling (int): Step between the selected dates of each country.
+            columns (List[str]): Columns to materialize. If None, all are materialized.
+
+        Returns:
+            pd.DataFrame: Selected data with the 'date' and 'country' columns.
+        """
+        if columns is None:
+            columns = self.columns
+        rows, row_countries = self.rows(countries, downsampling)
+
+        data = {
+            self.date_header:
+            np.datetime_as_string(self.array(self.date_header)[rows],
+                                  unit='D').astype(object),
+            self.country_header: row_countries,
+        }
+        for col in columns:
+            if col in self.columns:
+                data[col] = self.array(col)[rows]
+
+        return pd.DataFrame(data)
+
+    @classmethod
+    def from_df(cls,
+                df: pd.DataFrame,
+                path: str,
+                columns: List[str] = None,
+                **kwargs) -> 'ColumnStore':
+        """
+        Create the store in 'path' from the given DataFrame and return an instance of it.
+        """
+        return cls.from_csv_chunks([df], [df], path, columns, **kwargs)
+
+    @classmethod
+    def from_csv(cls,
+                 csv_path: str,
+                 path: str,
+                 columns: List[str] = None,
+                 chunksize: int = 1_000_000,
+                 **kwargs) -> 'ColumnStore':
+        """
+        Create the store in 'path' from the given csv and return an instance of it.
+
+        The csv is read in chunks of 'chunksize' rows twice: once for the country and date
+        columns, to sort the rows, and once for the values of the columns. If 'columns' isn't
+        given, the first pass reads all the columns to find the numeric ones.
+
+        Args:
+            csv_path (str): Path of the csv to read.
+            path (str): Directory where the store is created.
+            columns (List[str]): Columns to store. If None, all numeric columns except the
+                ROW_NUMBER_COLUMNS are stored.
+            chunksize (int): Number of rows of the csv read at once.
+
+        Returns:
+            ColumnStore: Instance of the created store.
+        """
+        country_header = kwargs.get('country_header', cls.country_header)
+        date_header = kwargs.get('date_header', cls.date_header)
+
+        index_chunks = pd.read_csv(
+            csv_path,
+            usecols=(None if columns is None else
+                     [country_header, date_header]),
+            dtype={country_header: 'category'},
+            chunksize=chunksize)
+        value_chunks = pd.read_csv(
+            csv_path,
+            usecols=(None if columns is None else
+                     lambda col: col in columns),
+            chunksize=chunksize)
+        return cls.from_csv_chunks(index_chunks, value_chunks, path, columns,
+                                   **kwargs)
+
+    @classmethod
+    def from_csv_chunks(cls,
+                        index_chunks,
+                        value_chunks,
+                        path: str,
+                        columns: List[str] = None,
+                        **kwargs) -> 'ColumnStore':
+        """
+        Create the store in 'path' from the chunks of the data and return an instance of it.
+
+        The values are stored as floats, and those that aren't numbers are stored as nulls.
+
+        Args:
+            index_chunks (Iterable[pd.DataFrame]): Chunks with at least the country and date
+                columns. If 'columns' is None, also with the columns to store.
+            value_chunks (Iterable[pd.DataFrame]): Chunks with the columns to store, in the same
+                row order as 'index_chunks'.
+            path (str): Directory where the store is created.
+            columns (List[str]): Columns to store. If None, the columns of 'index_chunks' with
+                only numbers or nulls in all the chunks are stored, except the ROW_NUMBER_COLUMNS.
+
+        Returns:
+            ColumnStore: Instance of the created store.
+        """
+        country_header = kwargs.get('country_header', cls.country_header)
+        date_header = kwargs.get('date_header', cls.date_header)
+        os.makedirs(path, exist_ok=True)
+
+        # Sort the rows by country and date, and find the numeric columns in the same pass, as a
+        # column can be all nulls (and read as numeric) in the first chunks
+        countries, dates = [], []
+        value_columns, non_numeric = {}, set()
+        not_values = (country_header, date_header) + ROW_NUMBER_COLUMNS
+        for chunk in index_chunks:
+            countries.append(chunk[country_header].astype('category').values)
+            dates.append(
+                pd.to_datetime(chunk[date_header]).values.astype(
+                    'datetime64[D]'))
+            if columns is None:
+                for col in chunk.columns:
+                    if col in not_values:
+                        continue
+                    value_columns.setdefault(col)
+                    if not is_numeric_dtype(
+                            chunk[col]) and chunk[col].notna().any():
+                        non_numeric.add(col)
+        if columns is None:
+            columns = [col for col in value_columns if col not in non_numeric]
+        countries = union_categoricals(countries, sort_categories=True)
+        dates = np.concatenate(dates)
+        order = np.lexsort((dates, countries.codes))
+
+        date_array = np.lib.format.open_memmap(os.path.join(path, DATE_FILE),
+                                               mode='w+',
+                                               dtype=dates.dtype,
+                                               shape=dates.shape)
+        date_array[:] = dates[order]
+        date_array.flush()
+
+        counts = np.bincount(countries.codes[order],
+                             minlength=len(countries.categories))
+        stops = np.cumsum(counts)
+        offsets = {
+            country: [int(stop - count), int(stop)]
+            for country, count, stop in zip(countries.categories, counts,
+                                            stops) if count
+        }
+        del countries, dates
+
+        # Write the values in csv order and then in sorted order, one column at a time
+        raw_arrays = {}
+        start = 0
+        for chunk in value_chunks:
+            for c, col in enumerate(columns):
+                if col not in raw_arrays:
+                    raw_arrays[col] = np.lib.format.open_memmap(
+                        os.path.join(path, f'raw_{column_file(c)}'),
+                        mode='w+',
+                        dtype=np.float64,
+                        shape=order.shape)
+                raw_arrays[col][start:start + len(chunk)] = pd.to_numeric(
+                    chunk[col], errors='coerce').to_numpy(dtype=np.float64)
+            start += len(chunk)
+
+        for c, col in enumerate(columns):
+            raw_path = os.path.join(path, f'raw_{column_file(c)}')
+            array = np.lib.format.open_memmap(os.path.join(path, column_file(c)),
+                                              mode='w+',
+                                              dtype=np.float64,
+                                              shape=order.shape)
+            for block in range(0, len(order), SORT_BLOCK_SIZE):
+                rows = order[block:block + SORT_BLOCK_SIZE]
+                array[block:block + len(rows)] = raw_arrays[col][rows]
+            array.flush()
+            del array, raw_arrays[col]
+            os.remove(raw_path)
+
+        with open(os.path.join(path, META_FILE), 'w') as f:
+            json.dump({'columns': columns, 'offsets': offsets}, f)
+
+        return cls(path=path, **kwargs)
+
+
+def column_file(column_number: int) -> str:
+    """
+    Name of the file of the given column number.
+    """
+    return f'col_{column_number}.npy'
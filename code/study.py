@@ -2,16 +2,21 @@
 This module contains the Study class that allows to analyze a given dataset.
 """
 
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from itertools import product
-from typing import List, Tuple
+from typing import TYPE_CHECKING, List, Tuple
 
 import pandas as pd
-from matplotlib.axes import Axes
 
 from covid import CovidStudyMixin
 from groupby import CovidCountryStudyGroupby
 from plot import PlotStudyMixin
+from similarity import SimilarityIndex
+from snapshot import SnapshotDiff
+from store import ColumnStore
+
+if TYPE_CHECKING:
+    from matplotlib.axes import Axes
 
 
 @dataclass
@@ -22,15 +27,35 @@ class Study():
 
     data: pd.DataFrame = None
 
+    # out-of-core data
+    store: ColumnStore = None
+
     # data parameters
     downsampling: int = 1
 
     def __post_init__(self):
 
-        if self.downsampling != 1:
+        if self.store is not None:
+            # Materialize only the selected subset, downsampling within each country
+            self.data = self.store.to_frame(countries=self.store_countries(),
+                                            downsampling=self.downsampling,
+                                            columns=self.store_columns())
+        elif self.downsampling != 1:
             self.data = self.data.iloc[::self.downsampling]
 
-    def plot(self) -> List[Axes]:
+    def store_countries(self) -> List[str]:
+        """
+        Countries to materialize from the `store`. All of them by default.
+        """
+        return None
+
+    def store_columns(self) -> List[str]:
+        """
+        Columns to materialize from the `store`. All of them by default.
+        """
+        return None
+
+    def plot(self) -> List['Axes']:
         """
         Generates the necessary plots from the data and returns the figures
 
@@ -54,6 +79,101 @@ class Study():
         """
         return cls.from_df(pd.read_csv(path), **kwargs)
 
+    @classmethod
+    def from_store(cls, store: ColumnStore, **kwargs) -> 'Study':
+        """
+        Create instance from given ColumnStore, materializing only the selected data.
+        """
+        return cls(store=store, **kwargs)
+
+
+def refresh_study(study: Study,
+                  data: pd.DataFrame,
+                  countries: List[str] = None):
+    """
+    Recomputes the data and the coverage of the given study from the given new version of the
+    data it was created from, with the same parameters. If 'countries' are given, only their
+    rows are recomputed and the rest are kept as they are.
+    """
+    if countries is None:
+        refreshed = replace(study, data=data, store=None, distribution=None)
+        study.data, study.coverage = refreshed.data, refreshed.coverage
+        study.distribution = None
+        return
+
+    refreshed = replace(study,
+                        data=data,
+                        countries_to_study=list(countries),
+                        store=None,
+                        distribution=None)
+    mask_country = study.data.index.get_level_values('country').isin(
+        countries)
+    study.data = pd.concat([study.data.loc[~mask_country], refreshed.data])
+    if study.coverage is not None and refreshed.coverage is not None:
+        study.coverage = pd.concat([
+            study.coverage.loc[~study.coverage.index.isin(countries)],
+            refreshed.coverage
+        ])
+    study.distribution = None
+
+
+def countries_to_refresh(study: Study, countries: List[str]) -> List[str]:
+    """
+    Returns the given countries that are studied in the given study.
+    """
+    if isinstance(study.countries_to_study, list):
+        countries = [c for c in countries if c in study.countries_to_study]
+    return countries
+
+
+def warn_partial_refresh(study: Study):
+    """
+    Warns that refreshing only some countries of the given study may not match a full rebuild.
+    """
+    if study.downsampling != 1:
+        print(
+            f"Refreshing only some countries with downsampling {study.downsampling} may select "
+            "other dates than a full rebuild if rows were inserted or deleted! Use `refresh`."
+        )
+
+
+def needs_rebuild(study: Study, diff: SnapshotDiff) -> bool:
+    """
+    Returns whether the given study must be fully rebuilt for the given diff: the dates selected
+    by the downsampling shift when rows are inserted or deleted.
+    """
+    rebuild = study.downsampling != 1 and bool(
+        len(diff.inserted) or len(diff.deleted))
+    if rebuild:
+        print(
+            f"Rows were inserted or deleted with downsampling {study.downsampling}, "
+            "the study will be fully rebuilt.")
+    return rebuild
+
+
+def unchanged_rows_differ(study: Study, data: pd.DataFrame,
+                          countries: List[str]) -> bool:
+    """
+    Returns whether the rows of the countries other than the given ones differ between the data
+    of the given study and the given new data, e.g. because the study the new data comes from
+    was fully rebuilt and its downsampling selected other dates.
+    """
+    old_index = study.data.index
+    old_index = old_index[~old_index.get_level_values('country').isin(
+        countries)]
+    new_index = data.index
+    new_index = new_index[~new_index.get_level_values('country').isin(
+        countries)]
+    if isinstance(study.countries_to_study, list):
+        new_index = new_index[new_index.get_level_values('country').isin(
+            study.countries_to_study)]
+    differ = not old_index.sort_values().equals(new_index.sort_values())
+    if differ:
+        print(
+            "The rows of the countries that didn't change differ from the new data, "
+            "the study will be fully rebuilt.")
+    return differ
+
 
 @dataclass
 class CovidCountryStudy(CovidStudyMixin, PlotStudyMixin, Study):
@@ -89,6 +209,60 @@ class CovidCountryStudy(CovidStudyMixin, PlotStudyMixin, Study):
 
         return product(self.rel_groups_to_study, self.rel_groups_to_pair_with)
 
+    def refresh_countries(self, data: pd.DataFrame, countries: List[str]):
+        """
+        This method recomputes the data of only the given countries from the given new version
+        of the raw data, e.g. the countries of a `SnapshotDiff`, and keeps the rest as they are.
+
+        Args:
+            data (pd.DataFrame): New version of the data the study was created from.
+            countries (List[str]): Countries to recompute.
+        """
+        warn_partial_refresh(self)
+        self.refresh_data(data, countries)
+
+    def refresh(self, data: pd.DataFrame, diff: SnapshotDiff):
+        """
+        This method updates the study to the given new version of the raw data, recomputing only
+        the countries of the given diff unless rows were inserted or deleted with downsampling,
+        in which case all of it is recomputed.
+
+        Args:
+            data (pd.DataFrame): New version of the data the study was created from.
+            diff (SnapshotDiff): Diff between the snapshots of the old and the new data.
+        """
+        if needs_rebuild(self, diff):
+            refresh_study(self, data)
+            return
+        self.refresh_data(data, diff.countries)
+
+    def refresh_data(self, data: pd.DataFrame, countries: List[str]):
+        """
+        This method recomputes the data of only the given countries, without checking the
+        downsampling.
+        """
+        countries = countries_to_refresh(self, countries)
+        if not countries:
+            return
+        refresh_study(self, data, countries)
+
+    @property
+    def similarity_params(self) -> List[Tuple[str]]:
+        return [('covid', 'status', 'confirmed'),
+                ('covid', 'status', 'deaths'),
+                ('index', '', 'stringency_index')]
+
+    def calc_similarity_index(self,
+                              parameters: List[Tuple[str]] = None,
+                              **kwargs) -> SimilarityIndex:
+        """
+        Creates the index of the country trajectories of the given parameters (by default, the
+        `similarity_params`) to find the countries with the most similar ones.
+        """
+        if parameters is None:
+            parameters = self.similarity_params
+        return SimilarityIndex.from_df(self.data, parameters, **kwargs)
+
 
 @dataclass
 class CovidByCountryStudy(CovidStudyMixin, PlotStudyMixin, Study):
@@ -106,6 +280,54 @@ class CovidByCountryStudy(CovidStudyMixin, PlotStudyMixin, Study):
     def __post_init__(self):
         return super().__post_init__()
 
+    def refresh_countries(self, data: pd.DataFrame, countries: List[str]):
+        """
+        This method recomputes the data and the grouped data of only the given countries.
+
+        Args:
+            data (pd.DataFrame): New version of the data the study was created from, e.g. the
+                data of the refreshed CovidCountryStudy.
+            countries (List[str]): Countries to recompute.
+        """
+        warn_partial_refresh(self)
+        self.refresh_data(data, countries)
+
+    def refresh(self, data: pd.DataFrame, diff: SnapshotDiff):
+        """
+        This method updates the study to the given new version of the data, recomputing only the
+        countries of the given diff unless rows were inserted or deleted with downsampling, in
+        which case all of it is recomputed.
+
+        The data is usually the data of the refreshed CovidCountryStudy, which may have been fully
+        rebuilt with its own downsampling. So all of it is also recomputed if the rows of the
+        countries that aren't in the diff changed.
+
+        Args:
+            data (pd.DataFrame): New version of the data the study was created from, e.g. the
+                data of the refreshed CovidCountryStudy.
+            diff (SnapshotDiff): Diff between the snapshots of the old and the new data.
+        """
+        if needs_rebuild(self, diff) or unchanged_rows_differ(
+                self, data, diff.countries):
+            refresh_study(self, data)
+            if self.groupby_data is not None:
+                self.groupby_data.data = self.groupby_data.calc_groupby_data(
+                    self.data)
+            return
+        self.refresh_data(data, diff.countries)
+
+    def refresh_data(self, data: pd.DataFrame, countries: List[str]):
+        """
+        This method recomputes the data and the grouped data of only the given countries, without
+        checking the downsampling.
+        """
+        countries = countries_to_refresh(self, countries)
+        if not countries:
+            return
+        refresh_study(self, data, countries)
+        if self.groupby_data is not None:
+            self.groupby_data.refresh_countries(self.data, countries)
+
     @classmethod
     def from_study(cls,
                    study: Study,